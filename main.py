@@ -2,16 +2,30 @@
 JIRA Task Exporter - Extracts tasks from JIRA and exports them to CSV
 """
 
+import argparse
+import asyncio
+import base64
+import aiohttp
 import requests
+import requests_cache
 import csv
+import hashlib
+import multiprocessing
 import re
-import json
+import orjson
 import urllib3
 import os
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Dict, List, Any, Optional, Union
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from itertools import chain, islice
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Any, Optional, Sequence, Union
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -23,215 +37,495 @@ class JiraConfig:
     username: str
     password: str
     verify_ssl: bool = False
+    max_workers: int = 5
+    cache_path: Optional[str] = "jira_cache.sqlite"
+    cache_expire_after: int = 3600
 
 
 class TextCleaner:
-    @staticmethod
-    def clean_field(field: Union[str, List, None]) -> str:
-        pattern = r"\s\(IM-\d+\)"
+    _IM_PATTERN = re.compile(r"\s\(IM-\d+\)")
 
+    @classmethod
+    def clean_field(cls, field: Union[str, List, None]) -> str:
         if not field:
             return ""
 
+        sub = cls._IM_PATTERN.sub
+
+        if isinstance(field, str):
+            return sub('', field)
+
         if isinstance(field, list):
-            cleaned_list = [re.sub(pattern, '', str(x)) for x in field]
-            return ','.join(cleaned_list)
+            return ','.join(sub('', x if isinstance(x, str) else str(x)) for x in field)
 
-        return re.sub(pattern, '', str(field))
+        return sub('', str(field))
 
 
 class JiraClient:
+    FETCH_ERRORS = (requests.exceptions.RequestException, orjson.JSONDecodeError)
+    RETRY_TOTAL = 6
+    RETRY_BACKOFF_FACTOR = 0.5
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    TOKEN_SEARCH_PATH = "/search/jql"
+    EXCLUDED_FIELDS = ("comment", "attachment", "worklog")
+
     def __init__(self, config: JiraConfig):
 
         self.config = config
         self.headers = {"Content-Type": "application/json"}
         self.auth = (config.username, config.password)
 
-    def get_tasks(self, jql_query: str, max_results_per_page: int = 50) -> List[Dict[str, Any]]:
-        start_at = 0
-        all_tasks = []
+        if config.cache_path:
+            self.session = requests_cache.CachedSession(
+                self._cache_name(),
+                backend="sqlite",
+                expire_after=config.cache_expire_after,
+                cache_control=False
+            )
+        else:
+            self.session = requests.Session()
+        self.session.auth = self.auth
+        self.session.headers.update(self.headers)
+        self.session.verify = config.verify_ssl
+
+        retry = Retry(
+            total=self.RETRY_TOTAL,
+            backoff_factor=self.RETRY_BACKOFF_FACTOR,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=("GET",),
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=8, pool_maxsize=32)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _cache_name(self) -> str:
+        # requests-cache leaves Authorization out of the cache key, so keep one cache per user
+        root, ext = os.path.splitext(self.config.cache_path)
+        user = hashlib.sha1((self.config.username or "").encode()).hexdigest()[:12]
+        return f"{root}-{user}{ext}"
+
+    def _uses_token_pagination(self) -> bool:
+        return (self.config.url or "").rstrip("/").endswith(self.TOKEN_SEARCH_PATH)
+
+    def _build_params(self, jql_query: str, max_results: int,
+                      fields: Optional[Sequence[str]] = None,
+                      fields_param: Optional[str] = None) -> Dict[str, Any]:
+        params = {
+            "jql": jql_query,
+            "maxResults": max_results,
+            "expand": ""
+        }
+
+        if fields_param:
+            requested = {x.strip().lstrip("-") for x in fields_param.split(",")}
+            params["fields"] = ",".join([fields_param, *(f"-{x}" for x in self.EXCLUDED_FIELDS
+                                                         if x not in requested)])
+        elif fields:
+            params["fields"] = ",".join(fields)
+
+        return params
+
+    @staticmethod
+    def _remaining_offsets(data: Dict[str, Any]) -> range:
+        issues = data.get("issues", [])
+        page_size = data.get("maxResults") or len(issues)
+
+        if not page_size:
+            return range(0)
+
+        return range(data.get("startAt", 0) + len(issues), data.get("total", 0), page_size)
+
+    def _fetch_page(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.session.get(self.config.url, params=params)
+        response.raise_for_status()
+
+        return orjson.loads(response.content)
+
+    def _get_tasks_by_token(self, params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        next_page_token = None
 
         while True:
-            params = {
-                "jql": jql_query,
-                "startAt": start_at,
-                "maxResults": max_results_per_page
-            }
+            page_params = dict(params)
+            if next_page_token:
+                page_params["nextPageToken"] = next_page_token
+
+            data = self._fetch_page(page_params)
+            yield from data.get("issues", [])
+
+            next_page_token = data.get("nextPageToken")
+            if not next_page_token or data.get("isLast"):
+                break
+
+    def _get_tasks_by_offset(self, params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        params = dict(params, validateQuery="false")
 
+        data = self._fetch_page(dict(params, startAt=0))
+        yield from data.get("issues", [])
+
+        offsets = iter(self._remaining_offsets(data))
+        window = self.config.max_workers
+        pending = deque()
+
+        with ThreadPoolExecutor(max_workers=window) as executor:
             try:
-                response = requests.get(
-                    self.config.url,
-                    headers=self.headers,
-                    params=params,
-                    auth=self.auth,
-                    verify=self.config.verify_ssl
-                )
-                response.raise_for_status()
-
-                issues = response.json().get("issues", [])
-                all_tasks.extend(issues)
-
-                if len(issues) < max_results_per_page:
-                    break
+                for offset in islice(offsets, window):
+                    pending.append(executor.submit(self._fetch_page, dict(params, startAt=offset)))
 
-                start_at += max_results_per_page
+                while pending:
+                    page = pending.popleft().result()
 
-            except requests.exceptions.RequestException as err:
-                print(f"Error occurred while fetching data from Jira: {err}")
-                break
+                    for offset in islice(offsets, 1):
+                        pending.append(executor.submit(self._fetch_page, dict(params, startAt=offset)))
+
+                    yield from page.get("issues", [])
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def get_tasks(self, jql_query: str, max_results_per_page: int = 50,
+                  fields: Optional[Sequence[str]] = None,
+                  fields_param: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        params = self._build_params(jql_query, max_results_per_page, fields, fields_param)
+
+        if self._uses_token_pagination():
+            yield from self._get_tasks_by_token(params)
+        else:
+            yield from self._get_tasks_by_offset(params)
+
+
+class AsyncJiraClient(JiraClient):
+    FETCH_ERRORS = JiraClient.FETCH_ERRORS + (aiohttp.ClientError, asyncio.TimeoutError)
+    RETRY_BACKOFF_MAX = 120
+
+    def __init__(self, config: JiraConfig, concurrency: Optional[int] = None):
+        # aiohttp pages bypass requests-cache, so don't create a cache file that is never read
+        super().__init__(replace(config, cache_path=None))
+        self.concurrency = concurrency or config.max_workers
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return max(float(retry_after), 0)
+            except ValueError:
+                pass
+
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+            except (TypeError, ValueError):
+                retry_at = None
+
+            if retry_at is not None:
+                if retry_at.tzinfo is None:
+                    retry_at = retry_at.replace(tzinfo=timezone.utc)
+                return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+        return min(self.RETRY_BACKOFF_FACTOR * 2 ** attempt, self.RETRY_BACKOFF_MAX)
+
+    async def _fetch_page_async(self, session: aiohttp.ClientSession,
+                                params: Dict[str, Any]) -> Dict[str, Any]:
+        for attempt in range(self.RETRY_TOTAL + 1):
+            last_attempt = attempt == self.RETRY_TOTAL
+
+            try:
+                async with session.get(self.config.url, params=params) as response:
+                    if response.status in self.RETRY_STATUSES and not last_attempt:
+                        delay = self._retry_delay(attempt, response.headers.get("Retry-After"))
+                    else:
+                        response.raise_for_status()
+                        return orjson.loads(await response.read())
+
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last_attempt:
+                    raise
+                delay = self._retry_delay(attempt)
+
+            await asyncio.sleep(delay)
+
+    async def _iter_pages_async(self, params: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        connector = aiohttp.TCPConnector(limit=self.concurrency, ssl=self.config.verify_ssl)
+
+        credentials = f"{self.config.username}:{self.config.password}".encode()
+        headers = dict(self.headers, Authorization=f"Basic {base64.b64encode(credentials).decode()}")
+
+        async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+            data = await self._fetch_page_async(session, dict(params, startAt=0))
+            yield data
+
+            offsets = iter(self._remaining_offsets(data))
+            pending = deque()
+
+            try:
+                for offset in islice(offsets, self.concurrency):
+                    pending.append(asyncio.ensure_future(
+                        self._fetch_page_async(session, dict(params, startAt=offset))))
+
+                while pending:
+                    page = await pending.popleft()
 
-        return all_tasks
+                    for offset in islice(offsets, 1):
+                        pending.append(asyncio.ensure_future(
+                            self._fetch_page_async(session, dict(params, startAt=offset))))
+
+                    yield page
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _get_tasks_by_offset(self, params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        params = dict(params, validateQuery="false")
+        loop = asyncio.new_event_loop()
+        pages = self._iter_pages_async(params)
+
+        try:
+            while True:
+                try:
+                    page = loop.run_until_complete(pages.__anext__())
+                except StopAsyncIteration:
+                    break
+
+                yield from page.get("issues", [])
+        finally:
+            loop.run_until_complete(pages.aclose())
+            loop.close()
 
 
 class JiraTaskFormatter:
-    def __init__(self, cleaner: TextCleaner):
+    # (output column, Jira field, subkey of a dict value, run through TextCleaner)
+    _SPEC = (
+        ("summary", "summary", None, False),
+        ("reporter", "reporter", "displayName", False),
+        ("L2 Assignee", "customfield_20145", None, False),
+        ("Responsible Team", "customfield_20161", None, True),
+        ("Incident Detected type", "customfield_20163", "value", False),
+        ("Vendor Related Incidents", "customfield_20906", "value", False),
+        ("status", "status", "name", False),
+        ("priority", "priority", "name", False),
+        ("System for incident", "customfield_20800", None, True),
+        ("System Owner", "customfield_20157", "displayName", False),
+        ("System owner department", "customfield_20129", None, True),
+        ("Impacted Business Process", "customfield_20160", None, True),
+        ("Impacted Systems", "customfield_20164", None, True),
+        ("Incident detected date", "customfield_20162", None, False),
+        ("Incident start date", "customfield_20158", None, False),
+        ("Incident end date", "customfield_20159", None, False),
+        ("Downtime Type", "customfield_20901", "value", False),
+        ("Downtime Outage", "customfield_20902", "value", False),
+        ("Incident Duration", "customfield_20908", "value", False),
+        ("Incident Details", "customfield_20136", None, False),
+        ("Root Cause Analysis", "customfield_20137", None, False),
+        ("Mitigation & Resolution", "customfield_20138", None, False),
+        ("Corrective Actions", "customfield_20148", None, False),
+        ("Incident solution", "customfield_20113", None, False),
+        ("Real downtime duration", "customfield_21519", None, False),
+        ("Error Rate", "customfield_20904", None, False),
+        ("Problem Links", "customfield_22301", None, False),
+    )
 
-        self.cleaner = cleaner
+    # Columns that need more than a lookup: output column -> method name
+    _HOOKS = {
+        "L2 Assignee": "_format_l2_assignee",
+        "Error Rate": "_format_error_rate",
+        "Problem Links": "_format_problem_links",
+    }
 
-    def get_nested_value(self, data: Dict[str, Any], key: str,
-                         subkey: Optional[str] = None) -> str:
-        if key not in data:
-            return ""
+    FIELDNAMES = ("key",) + tuple(column for column, _, _, _ in _SPEC)
+    REQUIRED_FIELDS = tuple(field_key for _, field_key, _, _ in _SPEC)
 
-        value = data[key]
+    def __init__(self, cleaner: TextCleaner):
 
+        self.cleaner = cleaner
+        self._clean = cleaner.clean_field
+
+    @staticmethod
+    def _format_l2_assignee(value: Optional[List[Dict[str, Any]]]) -> str:
         if not value:
             return ""
 
-        if not subkey:
-            return value
+        return ", ".join(x.get("emailAddress", "") for x in value)
+
+    @staticmethod
+    def _format_error_rate(value: Any) -> str:
+        return str(value or 0)
 
-        if isinstance(value, dict) and subkey in value:
-            return value[subkey] or ""
+    @staticmethod
+    def _format_problem_links(value: Optional[Dict[str, Any]]) -> str:
+        if isinstance(value, dict) and "value" in value:
+            return orjson.dumps(value["value"]).decode()
 
         return ""
 
-    def format_task(self, task: Dict[str, Any]) -> Dict[str, str]:
-        fields = task["fields"]
-
-        l2_assignee = ([x.get("emailAddress", "") for x in fields.get("customfield_20145", [])]
-                       if fields.get("customfield_20145") else [])
-
-        responsible_team = self.cleaner.clean_field(fields.get("customfield_20161", ""))
-        incident_type = self.get_nested_value(fields, "customfield_20163", "value")
-
-        vendor_related = ""
-        if "customfield_20906" in fields and fields["customfield_20906"]:
-            vendor_related = fields["customfield_20906"].get("value", "")
-
-        system_owner = ""
-        if fields.get("customfield_20157") and "displayName" in fields["customfield_20157"]:
-            system_owner = fields["customfield_20157"]["displayName"]
-
-        return {
-            "key": task["key"],
-            "summary": fields.get("summary", ""),
-            "reporter": fields.get("reporter", {}).get("displayName", ""),
-            "L2 Assignee": ", ".join(l2_assignee),
-            "Responsible Team": responsible_team,
-            "Incident Detected type": incident_type,
-            "Vendor Related Incidents": vendor_related,
-            "status": fields.get("status", {}).get("name", ""),
-            "priority": fields.get("priority", {}).get("name", ""),
-            "System for incident": self.cleaner.clean_field(fields.get("customfield_20800", "")),
-            "System Owner": system_owner,
-            "System owner department": self.cleaner.clean_field(fields.get("customfield_20129", "")),
-            "Impacted Business Process": self.cleaner.clean_field(fields.get("customfield_20160", "")),
-            "Impacted Systems": self.cleaner.clean_field(fields.get("customfield_20164", "")),
-            "Incident detected date": fields.get("customfield_20162", ""),
-            "Incident start date": fields.get("customfield_20158", ""),
-            "Incident end date": fields.get("customfield_20159", ""),
-            "Incident Duration": self.get_nested_value(fields, "customfield_20908", "value"),
-            "Downtime Type": self.get_nested_value(fields, "customfield_20901", "value"),
-            "Downtime Outage": self.get_nested_value(fields, "customfield_20902", "value"),
-            "Incident Details": fields.get("customfield_20136", ""),
-            "Mitigation & Resolution": fields.get("customfield_20138", ""),
-            "Root Cause Analysis": fields.get("customfield_20137", ""),
-            "Corrective Actions": fields.get("customfield_20148", ""),
-            "Incident solution": fields.get("customfield_20113", ""),
-            "Real downtime duration": fields.get("customfield_21519", ""),
-            "Error Rate": str(fields.get("customfield_20904", 0) or 0),
-            "Problem Links": (json.dumps(fields["customfield_22301"]["value"])
-                              if "customfield_22301" in fields
-                                 and fields["customfield_22301"]
-                                 and "value" in fields["customfield_22301"] else "")
-        }
+    @classmethod
+    def _build_row_function(cls) -> Callable[..., List[str]]:
+        namespace = {name: getattr(cls, name) for name in cls._HOOKS.values()}
+        items = ["task['key']"]
+
+        for column, field_key, subkey, clean in cls._SPEC:
+            lookup = f"fget({field_key!r})"
+
+            if column in cls._HOOKS:
+                items.append(f"{cls._HOOKS[column]}({lookup})")
+            elif subkey:
+                items.append(f"(v.get({subkey!r}) or '') if isinstance(v := {lookup}, dict) else ''")
+            elif clean:
+                items.append(f"clean({lookup})")
+            else:
+                items.append(f"'' if (v := {lookup}) is None else v")
+
+        source = "def _fmt(task, fields, clean):\n" \
+                 "    fget = fields.get\n" \
+                 "    return [\n" + "".join(f"        {item},\n" for item in items) + "    ]\n"
+
+        exec(compile(source, f"<{cls.__name__}._fmt>", "exec"), namespace)
+        return namespace["_fmt"]
+
+    def format_task(self, task: Dict[str, Any]) -> List[str]:
+        return self._fmt(task, task["fields"], self._clean)
+
+    def format_tasks(self, tasks: Iterable[Dict[str, Any]]) -> List[List[str]]:
+        return [self.format_task(task) for task in tasks]
+
+
+JiraTaskFormatter._fmt = staticmethod(JiraTaskFormatter._build_row_function())
 
 
 class DataExporter(ABC):
     @abstractmethod
-    def export(self, data: List[Dict[str, Any]]) -> None:
+    def export(self, data: Iterable[Sequence[Any]]) -> None:
         pass
 
 
 class CSVExporter(DataExporter):
+    BUFFER_SIZE = 1 << 20
 
-    def __init__(self, filename: str, delimiter: str = ';'):
+    def __init__(self, filename: str, fieldnames: Sequence[str], delimiter: str = ';'):
         self.filename = filename
+        self.fieldnames = list(fieldnames)
         self.delimiter = delimiter
 
-        self.fieldnames = [
-            "key", "summary", "reporter", "L2 Assignee", "Responsible Team",
-            "Incident Detected type", "Vendor Related Incidents", "status", "priority",
-            "System for incident", "System Owner", "System owner department",
-            "Impacted Business Process", "Impacted Systems", "Incident detected date",
-            "Incident start date", "Incident end date", "Downtime Type", "Downtime Outage",
-            "Incident Duration", "Incident Details", "Root Cause Analysis",
-            "Mitigation & Resolution", "Corrective Actions", "Incident solution",
-            "Real downtime duration", "Error Rate", "Problem Links"
-        ]
-
-    def export(self, data: List[Dict[str, Any]]) -> None:
+    def export(self, data: Iterable[Sequence[Any]]) -> None:
+        source_errors = []
+
+        def read_rows() -> Iterator[Sequence[Any]]:
+            try:
+                yield from data
+            except Exception as e:
+                source_errors.append(e)
+                raise
+
         try:
-            with open(self.filename, mode="w", newline="", encoding="utf-8-sig") as file:
-                writer = csv.DictWriter(
-                    file,
-                    fieldnames=self.fieldnames,
-                    delimiter=self.delimiter
-                )
-                writer.writeheader()
-                writer.writerows(data)
+            with open(self.filename, mode="w", newline="", encoding="utf-8-sig",
+                      buffering=self.BUFFER_SIZE) as file:
+                writer = csv.writer(file, delimiter=self.delimiter)
+                writer.writerow(self.fieldnames)
+                writer.writerows(read_rows())
 
             print(f"Tasks exported to '{self.filename}' successfully.")
         except Exception as e:
+            # Failures while producing rows belong to the caller; don't leave a partial file
+            if source_errors:
+                if os.path.exists(self.filename):
+                    os.remove(self.filename)
+                raise
+
+            if not isinstance(e, (OSError, csv.Error)):
+                raise
+
             print(f"Error exporting to CSV: {e}")
 
 
 class JiraTaskExporter:
+    PROCESS_POOL_CHUNK_SIZE = 256
+
     def __init__(self,
                  jira_client: JiraClient,
                  formatter: JiraTaskFormatter,
-                 exporter: DataExporter):
+                 exporter: DataExporter,
+                 process_pool_threshold: Optional[int] = None):
         self.jira_client = jira_client
         self.formatter = formatter
         self.exporter = exporter
+        self.process_pool_threshold = process_pool_threshold
 
-    def export_tasks(self, jql_query: str) -> None:
-        tasks = self.jira_client.get_tasks(jql_query)
+    def _format_tasks(self, tasks: Iterator[Dict[str, Any]]) -> Iterator[List[str]]:
+        format_task = self.formatter.format_task
+        workers = os.cpu_count() or 1
 
-        if not tasks:
-            print("No tasks found for the given query.")
+        if self.process_pool_threshold is None or workers <= 1:
+            for task in tasks:
+                yield format_task(task)
             return
 
-        formatted_tasks = [self.formatter.format_task(task) for task in tasks]
+        for task in islice(tasks, self.process_pool_threshold):
+            yield format_task(task)
 
-        self.exporter.export(formatted_tasks)
+        chunks = iter(lambda: list(islice(tasks, self.PROCESS_POOL_CHUNK_SIZE)), [])
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            return
+
+        pending = deque()
+
+        # spawn: the offset fetcher's threads are still alive inside the task generator
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            try:
+                for chunk in chain((first_chunk,), chunks):
+                    pending.append(executor.submit(self.formatter.format_tasks, chunk))
+
+                    if len(pending) >= 2 * workers:
+                        yield from pending.popleft().result()
+
+                while pending:
+                    yield from pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def export_tasks(self, jql_query: str, fields_param: Optional[str] = None) -> None:
+        tasks = self.jira_client.get_tasks(jql_query,
+                                           fields=self.formatter.REQUIRED_FIELDS,
+                                           fields_param=fields_param)
+
+        first_task = next(tasks, None)
+        if first_task is None:
+            print("No tasks found for the given query.")
+            return
+
+        self.exporter.export(self._format_tasks(chain((first_task,), tasks)))
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Export Jira tasks to CSV")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="fetch every page from Jira instead of the local response cache")
+    args = parser.parse_args()
+
     jira_config = JiraConfig(
         url=os.getenv("JIRA_URL"),
         username=os.getenv("JIRA_USERNAME"),
-        password=os.getenv("JIRA_PASSWORD")
+        password=os.getenv("JIRA_PASSWORD"),
+        max_workers=int(os.getenv("JIRA_MAX_WORKERS", "5")),
+        cache_path=None if args.no_cache else os.getenv("JIRA_CACHE_PATH", "jira_cache.sqlite")
     )
 
     cleaner = TextCleaner()
-    jira_client = JiraClient(jira_config)
+    if os.getenv("JIRA_ASYNC", "").lower() in ("1", "true", "yes"):
+        jira_client = AsyncJiraClient(jira_config)
+    else:
+        jira_client = JiraClient(jira_config)
     formatter = JiraTaskFormatter(cleaner)
-    exporter = CSVExporter("jira_exported_tasks.csv")
-    task_exporter = JiraTaskExporter(jira_client, formatter, exporter)
+    exporter = CSVExporter("jira_exported_tasks.csv", formatter.FIELDNAMES)
+    pool_threshold = os.getenv("JIRA_PROCESS_POOL_THRESHOLD")
+    task_exporter = JiraTaskExporter(jira_client, formatter, exporter,
+                                     process_pool_threshold=int(pool_threshold) if pool_threshold else None)
     jql_query = os.getenv("JIRA_JQL", 'project = "DefaultProject"')
-    task_exporter.export_tasks(jql_query)
+
+    try:
+        task_exporter.export_tasks(jql_query, fields_param=os.getenv("JIRA_FIELDS"))
+    except jira_client.FETCH_ERRORS as err:
+        print(f"Error occurred while fetching data from Jira: {err}")
+        raise SystemExit(1)
 
 
 